@@ -1,49 +1,137 @@
 import datetime as dt
+import functools
+import importlib.util
+import json
+import os
+import pickle
+import sqlite3
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import yaml
 import streamlit as st
-import matplotlib.pyplot as plt
-
-import feedparser
-import requests
 
 BASE = Path(__file__).resolve().parent
 PLAN_PATH = BASE / "plan.yaml"
 PROGRESS_PATH = BASE / "progress.csv"
 MILESTONES_PATH = BASE / "milestones.csv"
+STORE_PATH = BASE / "store.db"
 REFLECTIONS_PATH = BASE / "reflections.csv"
 FEEDS_PATH = BASE / "feeds.yaml"
 
+# pyarrow's multithreaded csv reader when installed; pandas' C engine otherwise
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+
+def file_mtime(path: Path) -> int:
+    # cache key for the loaders below; 0 when the file does not exist yet
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def file_key(path: Path) -> tuple:
+    # (mtime_ns, size): appends always grow the file, so a save within one mtime tick still changes the key
+    try:
+        st_ = path.stat()
+    except FileNotFoundError:
+        return (0, 0)
+    return (st_.st_mtime_ns, st_.st_size)
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml_cached(path_str: str, mtime: int):
+    path = Path(path_str)
+    st_ = os.stat(path)
+    key = (st_.st_mtime_ns, st_.st_size)
+    cache_path = path.with_suffix(path.suffix + ".pkl")
+    # sidecar pickle is reused until the yaml's (mtime, size) changes
+    try:
+        with open(cache_path, "rb") as f:
+            if pickle.load(f) == key:
+                return pickle.load(f)
+    except Exception:
+        pass
+    import yaml
+    # libyaml's C loader when available; pure-Python SafeLoader otherwise
+    Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=Loader)
+    try:
+        tmp = cache_path.with_suffix(cache_path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(key, f)
+            pickle.dump(data, f)
+        os.replace(tmp, cache_path)
+    except OSError:
+        pass
+    return data
+
 def load_yaml(path: Path, default=None):
     if not path.exists():
         return default
-    with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    # the mtime in the key makes edits to the yaml miss the lru cache
+    return _load_yaml_cached(str(path), file_mtime(path))
 
-def load_progress():
+def load_plan():
+    # plan_data.py (written by tools/compile_plan.py) skips yaml parsing while it matches plan.yaml
+    try:
+        from plan_data import PLAN, SOURCE
+    except ImportError:
+        return load_yaml(PLAN_PATH)
+    st_ = os.stat(PLAN_PATH)
+    if SOURCE == (st_.st_mtime_ns, st_.st_size):
+        return PLAN
+    return load_yaml(PLAN_PATH)
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_progress(key: tuple):
     if PROGRESS_PATH.exists():
-        df = pd.read_csv(PROGRESS_PATH)
+        df = pd.read_csv(PROGRESS_PATH, engine=CSV_ENGINE, parse_dates=["date"])
         if len(df) == 0:
             return df
-        df["date"] = pd.to_datetime(df["date"]).dt.date
-        return df
+        # day-resolution datetime64 + categorical keep date masks and module groupbys on the numpy/cython path
+        df["date"] = df["date"].values.astype("datetime64[D]")
+        df["module"] = df["module"].astype("category")
+        # sorted by date so cumulative_actual can slice ranges with searchsorted
+        return df.sort_values("date", kind="stable", ignore_index=True)
     return pd.DataFrame(columns=["date","module","minutes","note"])
 
-def save_progress(df: pd.DataFrame):
-    out = df.copy()
-    out["date"] = pd.to_datetime(out["date"]).dt.date.astype(str)
-    out.to_csv(PROGRESS_PATH, index=False)
-
-def load_milestones():
-    if MILESTONES_PATH.exists():
-        return pd.read_csv(MILESTONES_PATH)
-    return pd.DataFrame(columns=["week","done_date","note"])
+def append_csv(path: Path, new: pd.DataFrame, columns: list):
+    # append only the new rows; header is written when the file is missing or empty
+    if len(new) == 0:
+        return
+    header = not path.exists() or path.stat().st_size == 0
+    new[columns].to_csv(path, mode="a", header=header, index=False)
 
-def save_milestones(df: pd.DataFrame):
-    df.to_csv(MILESTONES_PATH, index=False)
-
-def load_reflections():
+def save_progress(new: pd.DataFrame):
+    out = new.copy()
+    out["date"] = pd.to_datetime(out["date"]).dt.date.astype(str)
+    append_csv(PROGRESS_PATH, out, ["date","module","minutes","note"])
+
+def connect_store():
+    con = sqlite3.connect(STORE_PATH)
+    with con:
+        con.execute("CREATE TABLE IF NOT EXISTS milestones(week INTEGER PRIMARY KEY, done_date TEXT, note TEXT)")
+        # one-time import of a legacy milestones.csv into the empty table
+        if MILESTONES_PATH.exists() and con.execute("SELECT COUNT(*) FROM milestones").fetchone()[0] == 0:
+            legacy = pd.read_csv(MILESTONES_PATH, dtype={"done_date": str, "note": str}, keep_default_na=False)
+            con.executemany("INSERT OR REPLACE INTO milestones VALUES (?,?,?)",
+                            legacy[["week","done_date","note"]].itertuples(index=False, name=None))
+    return con
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_milestones(key: tuple):
+    with closing(connect_store()) as con:
+        return pd.read_sql("SELECT week, done_date, note FROM milestones", con)
+
+def save_milestone(week: int, done_date: str, note: str):
+    # upsert keyed on week; no table rewrite
+    with closing(connect_store()) as con, con:
+        con.execute("INSERT OR REPLACE INTO milestones VALUES (?,?,?)", (int(week), done_date, note))
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def load_reflections(key: tuple):
     if REFLECTIONS_PATH.exists():
         df = pd.read_csv(REFLECTIONS_PATH)
         if len(df) == 0:
@@ -52,15 +140,18 @@ def load_reflections():
         return df
     return pd.DataFrame(columns=["timestamp","date","topic","mood","text","tags"])
 
-def save_reflections(df: pd.DataFrame):
-    df.to_csv(REFLECTIONS_PATH, index=False)
+@st.cache_data(show_spinner=False, max_entries=1)
+def reflections_bytes(key: tuple) -> bytes:
+    return REFLECTIONS_PATH.read_bytes() if REFLECTIONS_PATH.exists() else b""
+
+def save_reflections(new: pd.DataFrame):
+    append_csv(REFLECTIONS_PATH, new, ["timestamp","date","topic","mood","text","tags"])
 
 def planned_minutes_per_day(plan):
     modules = plan["meta"]["modules"]
     return {m: int(modules[m]["planned_minutes_per_day"]) for m in modules}
 
-def cumulative_planned(plan, start_date, end_date):
-    p = planned_minutes_per_day(plan)
+def cumulative_planned(p, start_date, end_date):
     days = (end_date - start_date).days + 1
     totals = {m: p[m] * days for m in p}
     totals["total"] = sum(totals.values())
@@ -69,10 +160,12 @@ def cumulative_planned(plan, start_date, end_date):
 def cumulative_actual(df, start_date, end_date):
     if len(df) == 0:
         return {"total": 0}
-    mask = (df["date"] >= start_date) & (df["date"] <= end_date)
-    sub = df.loc[mask]
-    totals = sub.groupby("module")["minutes"].sum().to_dict()
-    totals["total"] = int(sub["minutes"].sum()) if len(sub) else 0
+    # df is date-sorted (see load_progress): binary-search the bounds and slice
+    bounds = np.array([start_date, end_date + dt.timedelta(days=1)], dtype="datetime64[D]")
+    i0, i1 = np.searchsorted(df["date"].values, bounds.astype(df["date"].values.dtype))
+    sub = df.iloc[i0:i1]
+    totals = sub.groupby("module", observed=True)["minutes"].sum().to_dict()
+    totals["total"] = int(sub["minutes"].values.sum()) if len(sub) else 0
     return totals
 
 def week_index(plan, today):
@@ -82,67 +175,132 @@ def week_index(plan, today):
         return 0
     return delta_days // 7 + 1
 
-@st.cache_data(ttl=3600)
-def fetch_rss(url: str, max_items: int = 10, timeout: int = 8):
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _entry_fields(elem) -> dict:
+    title = link = published = updated = ""
+    for child in elem:
+        name = _local(child.tag)
+        text = (child.text or "").strip()
+        if name == "title":
+            title = text
+        elif name == "link" and not link:
+            # rss puts the url in the text, atom in href (skip non-alternate links)
+            if child.get("rel", "alternate") == "alternate":
+                link = text or child.get("href", "").strip()
+        elif name in ("pubDate", "published", "date") and not published:
+            published = text
+        elif name == "updated" and not updated:
+            updated = text
+    return {"title": title, "link": link, "published": published or updated}
+
+def _fetch_rss_feedparser(url: str, max_items: int, timeout: int, headers: dict):
+    import feedparser
+    import requests
+    r = requests.get(url, headers=headers, timeout=timeout)
+    r.raise_for_status()
+    parsed = feedparser.parse(r.content)
+    items = []
+    for e in parsed.entries[:max_items]:
+        title = getattr(e, "title", "").strip()
+        link = getattr(e, "link", "").strip()
+        published = getattr(e, "published", "") or getattr(e, "updated", "")
+        items.append({"title": title, "link": link, "published": published})
+    return items
+
+@st.cache_resource
+def rss_validators() -> dict:
+    # (url, max_items) -> {"etag", "lm", "items"}; shared across reruns and sessions
+    return {}
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_rss(url: str, max_items: int = 10, timeout: int = 8, _validators: dict = None):
+    import requests
     headers = {"User-Agent": "study-tracker/1.0 (+streamlit)"}
+    key = (url, max_items)
+    prev = _validators.get(key, {}) if _validators is not None else {}
+    cond = dict(headers)
+    if prev.get("etag"):
+        cond["If-None-Match"] = prev["etag"]
+    if prev.get("lm"):
+        cond["If-Modified-Since"] = prev["lm"]
     try:
-        r = requests.get(url, headers=headers, timeout=timeout)
-        r.raise_for_status()
-        parsed = feedparser.parse(r.text)
+        # stream the body and stop parsing once max_items entries are read
         items = []
-        for e in parsed.entries[:max_items]:
-            title = getattr(e, "title", "").strip()
-            link = getattr(e, "link", "").strip()
-            published = getattr(e, "published", "") or getattr(e, "updated", "")
-            items.append({"title": title, "link": link, "published": published})
+        try:
+            with requests.get(url, headers=cond, timeout=timeout, stream=True) as r:
+                if r.status_code == 304 and "items" in prev:
+                    return prev["items"], None
+                r.raise_for_status()
+                r.raw.decode_content = True
+                for _, elem in ET.iterparse(r.raw, events=("end",)):
+                    if _local(elem.tag) in ("item", "entry"):
+                        items.append(_entry_fields(elem))
+                        elem.clear()
+                        if len(items) >= max_items:
+                            break
+                if _validators is not None:
+                    _validators[key] = {"etag": r.headers.get("ETag"), "lm": r.headers.get("Last-Modified"), "items": items}
+        except (ET.ParseError, ValueError):
+            items = _fetch_rss_feedparser(url, max_items, timeout, headers)
         return items, None
     except Exception as ex:
         return [], str(ex)
 
-def render_week_plan(wk: dict):
+@st.cache_data(show_spinner=False)
+def _week_blob(wk_json: str) -> str:
+    wk = json.loads(wk_json)
     focus = wk.get("focus", [])
     deliverable = wk.get("deliverable", "")
     daily = wk.get("daily_tasks", {})
     resources = wk.get("resources", [])
 
-    st.markdown("### 🎯 Focus")
-    for f in focus:
-        st.markdown(f"- {f}")
+    lines = ["### 🎯 Focus"]
+    lines += [f"- {f}" for f in focus]
 
-    st.markdown("### 🧩 Deliverable")
-    st.info(deliverable)
+    lines += ["", "### 🧩 Deliverable", f"> {deliverable}"]
 
-    st.markdown("### 📅 Daily tasks (清单)")
+    lines += ["", "### 📅 Daily tasks (清单)"]
     order = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
     rows = []
     for d in order:
         if d in daily:
-            rows.append({"Day": d, "Task": daily[d]})
+            task = str(daily[d]).replace("|", "\\|")
+            rows.append(f"| {d} | {task} |")
     if rows:
-        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        lines += ["| Day | Task |", "| --- | --- |"] + rows
     else:
-        st.write("No daily tasks found for this week.")
+        lines.append("No daily tasks found for this week.")
 
-    st.markdown("### 🔗 Resources")
+    lines += ["", "### 🔗 Resources"]
     for r in resources:
         name = r.get("name","(resource)")
         url = r.get("url","")
         if url:
-            st.markdown(f"- [{name}]({url})")
+            lines.append(f"- [{name}]({url})")
         else:
-            st.markdown(f"- {name}")
+            lines.append(f"- {name}")
+    return "\n".join(lines)
+
+def render_week_plan(wk: dict):
+    # the whole week renders as one cached markdown blob
+    blob = _week_blob(json.dumps(wk, sort_keys=True, ensure_ascii=False, default=str))
+    st.markdown(blob)
 
 st.set_page_config(page_title="Study Tracker", layout="wide")
-plan = load_yaml(PLAN_PATH)
+plan = load_plan()
 feeds = load_yaml(FEEDS_PATH, default={"sections": [], "fetch": {"max_items_per_feed": 10, "timeout_seconds": 8}})
-df = load_progress()
-ms = load_milestones()
-rf = load_reflections()
+df = load_progress(file_key(PROGRESS_PATH))
+ms = load_milestones(file_key(STORE_PATH))
+rf = load_reflections(file_key(REFLECTIONS_PATH))
 
 start_date = dt.date.fromisoformat(plan["meta"]["start_date"])
 today = dt.date.today()
 current_week = week_index(plan, today)
 weeks = plan.get("weeks", [])
+PLANNED_PER_DAY = planned_minutes_per_day(plan)
+PLANNED_TOTAL_PER_DAY = sum(PLANNED_PER_DAY.values())
 
 st.title("📚 Study Tracker (Plan + Daily Logs)")
 tab1, tab2, tab3 = st.tabs(["✅ 日常记录", "🗺️ 课表/进度", "🧠 研究雷达 + 反思"])
@@ -162,30 +320,25 @@ with tab1:
         with c1:
             if st.button("Add log", use_container_width=True):
                 new = pd.DataFrame([{"date": log_date, "module": module, "minutes": minutes, "note": note}])
-                df2 = pd.concat([df, new], ignore_index=True)
-                save_progress(df2)
+                save_progress(new)
                 st.success("Saved ✅  (progress.csv updated)")
                 st.rerun()
         with c2:
             if st.button("Quick add (planned today)", use_container_width=True):
-                p = planned_minutes_per_day(plan)
-                rows = [{"date": log_date, "module": m, "minutes": int(mins), "note": "planned"} for m, mins in p.items() if mins > 0]
-                df2 = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
-                save_progress(df2)
+                rows = [{"date": log_date, "module": m, "minutes": mins, "note": "planned"} for m, mins in PLANNED_PER_DAY.items() if mins > 0]
+                save_progress(pd.DataFrame(rows))
                 st.success("Added planned minutes ✅")
                 st.rerun()
 
         st.markdown("---")
         st.subheader("🏁 Weekly deliverable")
         st.write(f"Current week: **Week {current_week}**")
-        done = st.checkbox("I completed this week's deliverable", key="deliverable_done")
+        already_done = bool((ms["week"] == current_week).any())
+        done = st.checkbox("I completed this week's deliverable", value=already_done, key="deliverable_done")
         done_note = st.text_input("Deliverable note (optional)", value="", key="deliverable_note")
         if st.button("Save deliverable status", key="save_deliv"):
             if done:
-                ms2 = ms.copy()
-                ms2 = ms2[ms2["week"] != current_week]
-                ms2 = pd.concat([ms2, pd.DataFrame([{"week": current_week, "done_date": str(log_date), "note": done_note}])], ignore_index=True)
-                save_milestones(ms2)
+                save_milestone(current_week, str(log_date), done_note)
                 st.success("Deliverable marked done ✅")
             else:
                 st.info("Unchecked — no changes made.")
@@ -200,8 +353,7 @@ with tab1:
 
 with tab2:
     st.subheader("📈 Are you on track?")
-    planned_day = planned_minutes_per_day(plan)
-    planned_total = cumulative_planned(plan, start_date, today)
+    planned_total = cumulative_planned(PLANNED_PER_DAY, start_date, today)
     actual_total = cumulative_actual(df, start_date, today)
 
     col1, col2, col3, col4 = st.columns(4)
@@ -215,32 +367,24 @@ with tab2:
     if len(df) == 0:
         st.info("No logs yet. Add a log in the first tab.")
     else:
-        tmp = df.copy()
-        tmp["date"] = pd.to_datetime(tmp["date"])
-        daily = tmp.groupby(tmp["date"].dt.date)["minutes"].sum().reset_index().sort_values("date")
-        planned_per_day = sum(planned_day.values())
-        daily["planned"] = planned_per_day
-
-        fig = plt.figure()
-        plt.plot(daily["date"], daily["minutes"], label="actual")
-        plt.plot(daily["date"], daily["planned"], label="planned")
-        plt.xticks(rotation=45, ha="right")
-        plt.ylabel("minutes")
-        plt.legend()
-        st.pyplot(fig, clear_figure=True)
+        daily = df.groupby("date")["minutes"].sum().rename("actual").to_frame()
+        daily["planned"] = PLANNED_TOTAL_PER_DAY
+        st.line_chart(daily)
 
     st.markdown("### Module breakdown (cumulative)")
-    rows = []
-    for m in planned_day.keys():
-        rows.append({"module": m, "planned": planned_total.get(m, 0), "actual": actual_total.get(m, 0), "ahead_behind": actual_total.get(m, 0) - planned_total.get(m, 0)})
-    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    planned = pd.Series(planned_total, dtype="int64").drop("total")
+    actual = pd.Series(actual_total, dtype="int64").drop("total", errors="ignore")
+    table = pd.concat({"planned": planned, "actual": actual.reindex(planned.index, fill_value=0)}, axis=1)
+    table["ahead_behind"] = table["actual"] - table["planned"]
+    st.dataframe(table.reset_index(names="module"), use_container_width=True, hide_index=True)
 
     st.markdown("---")
     st.subheader("🧾 Logs (latest first)")
     if len(df) == 0:
         st.write("No logs yet.")
     else:
-        st.dataframe(df.sort_values("date", ascending=False), use_container_width=True, hide_index=True)
+        st.dataframe(df.sort_values("date", ascending=False), use_container_width=True, hide_index=True,
+                     column_config={"date": st.column_config.DateColumn()})
 
 with tab3:
     left, right = st.columns([1.2, 0.8], gap="large")
@@ -250,6 +394,19 @@ with tab3:
         max_items = int(feeds.get("fetch", {}).get("max_items_per_feed", 10))
         timeout = int(feeds.get("fetch", {}).get("timeout_seconds", 8))
 
+        # fetch every rss feed up front in parallel; rendering below reads from rss_results
+        rss_urls = list(dict.fromkeys(
+            item.get("url","")
+            for sec in feeds.get("sections", [])
+            for item in sec.get("items", [])
+            if item.get("type","link") == "rss"
+        ))
+        rss_results = {}
+        validators = rss_validators()
+        if rss_urls:
+            with ThreadPoolExecutor(max_workers=min(8, len(rss_urls))) as pool:
+                rss_results = dict(zip(rss_urls, pool.map(lambda u: fetch_rss(u, max_items=max_items, timeout=timeout, _validators=validators), rss_urls)))
+
         for sec in feeds.get("sections", []):
             with st.expander(f"📌 {sec.get('name','Section')}", expanded=False):
                 st.write(sec.get("description",""))
@@ -261,18 +418,21 @@ with tab3:
                         st.markdown(f"- [{title}]({url})")
                     elif typ == "rss":
                         st.markdown(f"**{title}**  ·  [{url}]({url})")
-                        entries, err = fetch_rss(url, max_items=max_items, timeout=timeout)
+                        entries, err = rss_results[url]
                         if err:
                             st.warning(f"RSS fetch failed: {err}")
-                        else:
+                        elif entries:
+                            # one markdown element per feed instead of one per entry
+                            lines = []
                             for e in entries:
                                 t = e["title"] or "(no title)"
                                 l = e["link"] or url
                                 p = e["published"]
                                 if p:
-                                    st.markdown(f"- [{t}]({l})  \n  <small>{p}</small>", unsafe_allow_html=True)
+                                    lines.append(f"- [{t}]({l})  \n  <small>{p}</small>")
                                 else:
-                                    st.markdown(f"- [{t}]({l})")
+                                    lines.append(f"- [{t}]({l})")
+                            st.markdown("\n".join(lines), unsafe_allow_html=True)
                     else:
                         st.markdown(f"- [{title}]({url})")
 
@@ -286,8 +446,7 @@ with tab3:
         if st.button("Save reflection"):
             now = dt.datetime.now()
             new = pd.DataFrame([{"timestamp": now.isoformat(timespec="seconds"), "date": str(today), "topic": topic, "mood": mood, "text": text.strip(), "tags": tags.strip()}])
-            rf2 = pd.concat([rf, new], ignore_index=True)
-            save_reflections(rf2)
+            save_reflections(new)
             st.success("Saved ✅ (reflections.csv updated)")
             st.rerun()
 
@@ -298,6 +457,6 @@ with tab3:
             show = rf.sort_values("timestamp", ascending=False).head(15)
             st.dataframe(show, use_container_width=True, hide_index=True)
 
-        st.download_button("Download reflections.csv", data=REFLECTIONS_PATH.read_bytes(), file_name="reflections.csv", mime="text/csv")
+        st.download_button("Download reflections.csv", data=reflections_bytes(file_key(REFLECTIONS_PATH)), file_name="reflections.csv", mime="text/csv")
 
 st.caption("Tip: edit plan.yaml; edit feeds.yaml to change sources.")
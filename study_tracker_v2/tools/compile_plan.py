@@ -0,0 +1,33 @@
+"""Compile plan.yaml into plan_data.py so app.py can import the plan instead of parsing YAML.
+
+Usage: python tools/compile_plan.py
+"""
+import os
+import pprint
+from pathlib import Path
+
+import yaml
+
+BASE = Path(__file__).resolve().parent.parent
+PLAN_PATH = BASE / "plan.yaml"
+OUT_PATH = BASE / "plan_data.py"
+
+def compile_plan(src: Path = PLAN_PATH, out: Path = OUT_PATH):
+    Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    st_ = os.stat(src)
+    with open(src, "r", encoding="utf-8") as f:
+        plan = yaml.load(f, Loader=Loader)
+    # the source stat lets app.py ignore a plan_data.py that is older than plan.yaml
+    body = (
+        f"# Generated from {src.name} by tools/compile_plan.py. Do not edit.\n"
+        "import datetime\n\n"
+        f"SOURCE = ({st_.st_mtime_ns}, {st_.st_size})\n\n"
+        f"PLAN = {pprint.pformat(plan, indent=2, width=100, sort_dicts=False)}\n"
+    )
+    tmp = out.with_suffix(".py.tmp")
+    tmp.write_text(body, encoding="utf-8")
+    os.replace(tmp, out)
+
+if __name__ == "__main__":
+    compile_plan()
+    print(f"wrote {OUT_PATH}")